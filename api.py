@@ -1,15 +1,27 @@
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, Response, stream_with_context
+from flask_caching import Cache
 import boto3
+from botocore.config import Config
 import os
 import json
+import orjson
+import hmac
+import hashlib
+import time
 from decimal import Decimal
 from dotenv import load_dotenv
 from functools import wraps
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
 
 load_dotenv()
 
 app = Flask(__name__)
 
+# Server-side cache for scan results
+cache = Cache(app, config={'CACHE_TYPE': 'SimpleCache'})
+CACHE_TIMEOUT = 60  # Also the max-age clients may reuse a response for before revalidating
+
 # Load config
 def load_config():
     with open('config.json', 'r') as f:
@@ -17,29 +29,119 @@ def load_config():
 
 config = load_config()
 
-# Initialize DynamoDB
+# Number of parallel scan segments; keep this well below the table's item count
+SCAN_SEGMENTS = 8
+
+# Initialize DynamoDB (pool sized so parallel segments don't wait on connections)
 dynamodb = boto3.resource(
     'dynamodb',
     region_name=config['aws']['region'],
     aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-    aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY')
+    aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
+    config=Config(max_pool_connections=SCAN_SEGMENTS * 2)
 )
 table = dynamodb.Table(config['dynamodb']['table_name'])
 
+# Client shared with the resource (so items come back deserialized), used for paginated scans
+dynamodb_client = dynamodb.meta.client
+SCAN_PAGE_SIZE = 1000
+BATCH_GET_LIMIT = 100  # DynamoDB BatchGetItem maximum keys per call
+BATCH_GET_MAX_ATTEMPTS = 5
+BATCH_GET_BACKOFF = 0.05  # Seconds before the first retry, doubled after each one
+
 # Simple auth token (in production, use proper JWT or OAuth)
 AUTH_TOKEN = os.getenv('API_AUTH_TOKEN', 'fkvjabkjfbajfdvajkdfhpiuaerhgpaiubf')
 
+# Expected Authorization header, built once instead of on every request
+EXPECTED_AUTH_HEADER = f'Bearer {AUTH_TOKEN}'
+EXPECTED_AUTH_BYTES = EXPECTED_AUTH_HEADER.encode()
+
 def decimal_default(obj):
-    """JSON serializer for Decimal objects"""
+    """JSON serializer for Decimal objects, encoded as strings like jsonify does"""
     if isinstance(obj, Decimal):
-        return float(obj)
+        return str(obj)
     raise TypeError
 
+def parse_list_arg(name):
+    """Parse a comma-separated query arg, dropping blanks and duplicates"""
+    values = (v.strip() for v in request.args.get(name, '').split(','))
+    return list(dict.fromkeys(v for v in values if v))
+
+def projection_args(fields):
+    """Build ProjectionExpression kwargs so DynamoDB only returns the given attributes"""
+    if not fields:
+        return {}
+    # Placeholders keep attribute names with spaces or reserved words valid
+    names = {f'#f{i}': field for i, field in enumerate(fields)}
+    return {
+        'ProjectionExpression': ', '.join(names),
+        'ExpressionAttributeNames': names
+    }
+
+def scan_segment(segment, total_segments, fields=None):
+    """Scan one segment of the table, returning its item count and serialized items"""
+    paginator = dynamodb_client.get_paginator('scan')
+    pages = paginator.paginate(
+        TableName=config['dynamodb']['table_name'],
+        Segment=segment,
+        TotalSegments=total_segments,
+        PaginationConfig={'PageSize': SCAN_PAGE_SIZE},
+        **projection_args(fields)
+    )
+    count = 0
+    chunks = []
+    for page in pages:
+        if page['Items']:
+            # Serialized page by page so each page's item dicts can be freed right away
+            chunks.append(serialize_items(page['Items']))
+            count += len(page['Items'])
+    return count, b','.join(chunks)
+
+def scan_table(fields=None):
+    """Scan all segments in parallel, yielding (count, serialized items) in segment order"""
+    with ThreadPoolExecutor(max_workers=SCAN_SEGMENTS) as executor:
+        futures = deque(
+            executor.submit(scan_segment, segment, SCAN_SEGMENTS, fields)
+            for segment in range(SCAN_SEGMENTS)
+        )
+        # Segment order (not completion order) keeps the body, and so its ETag,
+        # identical while the data is unchanged. Popping drops each segment once
+        # the caller has moved past it
+        while futures:
+            yield futures.popleft().result()
+
+def serialize_items(items):
+    """Serialize a list of items as JSON array elements, minus the list brackets"""
+    return orjson.dumps(items, default=decimal_default, option=orjson.OPT_SORT_KEYS)[1:-1]
+
+def batch_get_items(email_ids, fields=None):
+    """Fetch records for many EmailIds with BatchGetItem, up to 100 keys per call"""
+    table_name = config['dynamodb']['table_name']
+    items = []
+    for start in range(0, len(email_ids), BATCH_GET_LIMIT):
+        keys = [{'EmailId': email_id} for email_id in email_ids[start:start + BATCH_GET_LIMIT]]
+        request_items = {table_name: {'Keys': keys, **projection_args(fields)}}
+        # Retry keys DynamoDB couldn't process (usually throttling), backing off each round
+        for attempt in range(BATCH_GET_MAX_ATTEMPTS):
+            if attempt:
+                time.sleep(BATCH_GET_BACKOFF * 2 ** (attempt - 1))
+            response = dynamodb.batch_get_item(RequestItems=request_items)
+            items.extend(response['Responses'].get(table_name, []))
+            request_items = response.get('UnprocessedKeys')
+            if not request_items:
+                break
+        else:
+            unprocessed = len(request_items[table_name]['Keys'])
+            raise RuntimeError(
+                f'{unprocessed} keys still unprocessed after {BATCH_GET_MAX_ATTEMPTS} BatchGetItem attempts'
+            )
+    return items
+
 def require_auth(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = request.headers.get('Authorization')
-        if not token or token != f'Bearer {AUTH_TOKEN}':
+        token = request.headers.get('Authorization', '').encode()
+        if not hmac.compare_digest(token, EXPECTED_AUTH_BYTES):
             return jsonify({'error': 'Invalid or missing auth token'}), 401
         return f(*args, **kwargs)
     return decorated
@@ -48,7 +150,7 @@ def require_auth(f):
 def debug_auth():
     """Debug endpoint to check auth token"""
     token = request.headers.get('Authorization')
-    expected = f'Bearer {AUTH_TOKEN}'
+    expected = EXPECTED_AUTH_HEADER
     return jsonify({
         'received_token': token,
         'expected_token': expected,
@@ -59,24 +161,78 @@ def debug_auth():
 @app.route('/api/crm/data', methods=['GET'])
 @require_auth
 def get_all_data():
-    """Get all data from DynamoDB table"""
-    try:
-        response = table.scan()
-        items = response['Items']
+    """Get all data (or the records in ?emails=a,b,c), limited to ?fields=x,y if given"""
+    fields = parse_list_arg('fields')
+    if 'emails' in request.args:
+        # Duplicate keys are rejected by BatchGetItem, so they're dropped here
+        email_ids = parse_list_arg('emails')
+        try:
+            items = batch_get_items(email_ids, fields)
+            return Response(orjson.dumps({
+                'success': True,
+                'count': len(items),
+                'data': items
+            }, default=decimal_default), mimetype='application/json')
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    cache_key = f'crm_data:{request.full_path}'
+    cached = cache.get(cache_key)
+    if cached is None:
+        try:
+            # Scan and serialize the first segment up front so errors there still
+            # return a 500; failures in later segments can only truncate the body
+            segments = scan_table(fields)
+            first_segment = next(segments, None)
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+        
+        def generate():
+            nonlocal cached, first_segment
+            # The whole body is kept for the cache, so memory still grows with the
+            # table's JSON size; streaming just avoids holding the items as well and
+            # gets the first bytes out before the scan finishes
+            chunks = [b'{"success":true,"data":[']
+            digest = hashlib.sha1(chunks[0])
+            yield chunks[0]
+            count = 0
+            segment, first_segment = first_segment, None
+            while segment is not None:
+                segment_count, chunk = segment
+                if segment_count:
+                    chunks.append(chunk if count == 0 else b',' + chunk)
+                    digest.update(chunks[-1])
+                    yield chunks[-1]
+                    count += segment_count
+                segment = next(segments, None)
+            chunks.append(b'],"count":%d}' % count)
+            digest.update(chunks[-1])
+            yield chunks[-1]
+            
+            # Only cache responses that were built to completion; if the client
+            # disconnects mid-stream nothing is cached and the next request scans again
+            cached = (digest.hexdigest(), b''.join(chunks))
+            cache.set(cache_key, cached, timeout=CACHE_TIMEOUT)
         
-        # Handle pagination if needed
-        while 'LastEvaluatedKey' in response:
-            response = table.scan(ExclusiveStartKey=response['LastEvaluatedKey'])
-            items.extend(response['Items'])
+        if not request.if_none_match:
+            # Headers go out before the body, so a streamed response has no ETag;
+            # the next request is served from the cache with one
+            return Response(stream_with_context(generate()), mimetype='application/json')
         
-        return jsonify({
-            'success': True,
-            'count': len(items),
-            'data': items
-        }), 200, {'Content-Type': 'application/json'}
+        # Revalidating clients need the ETag before the body, so build it in full
+        try:
+            for _ in generate():
+                pass
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
     
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    # Answers If-None-Match with a 304 when the client already has this body
+    etag, body = cached
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.max_age = CACHE_TIMEOUT
+    return response.make_conditional(request)
 
 @app.route('/api/crm/data/<email_id>', methods=['GET'])
 @require_auth
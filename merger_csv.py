@@ -1,44 +1,130 @@
 #!/usr/bin/env python3
 import os
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import polars as pl
 import argparse
-from fnmatch import fnmatch
+import re
+import fnmatch
+from concurrent.futures import ThreadPoolExecutor
 
-def merge_and_clean_files(input_dir, output_file, file_pattern=None, file_type='excel', custom_transforms=None, skip_cleaning=False):
+# Maximum number of files read concurrently
+MAX_READ_WORKERS = 8
+
+# Keep CSV text Arrow-backed when converting to pandas, so cleaning can use Arrow kernels
+ARROW_STRING_TYPES = {
+    pa.string(): pd.StringDtype('pyarrow'),
+    pa.large_string(): pd.StringDtype('pyarrow'),
+}
+
+def list_input_files(input_dir, file_pattern=None):
+    """List files in input_dir, filtered by file_pattern if specified"""
+    # Compile the pattern once rather than matching each name with fnmatch()
+    pattern = re.compile(fnmatch.translate(file_pattern.lower())) if file_pattern else None
+    with os.scandir(input_dir) as entries:
+        all_files = [
+            entry.name for entry in entries
+            if entry.is_file() and (pattern is None or pattern.match(entry.name.lower()))
+        ]
+    if file_pattern:
+        print(f"Files matching pattern '{file_pattern}': {len(all_files)}")
+    return all_files
+
+def read_files(read_fn, paths):
+    """Read files concurrently, returning results in the same order as paths"""
+    if not paths:
+        return []
+    with ThreadPoolExecutor(max_workers=min(MAX_READ_WORKERS, len(paths))) as executor:
+        return list(executor.map(read_fn, paths))
+
+def dedup_column_names(names):
+    """Rename repeated column names the way pandas does ('name', 'name.1', ...)"""
+    counts = {}
+    deduped = []
+    for name in names:
+        count = counts.get(name, 0)
+        while count > 0:
+            counts[name] = count + 1
+            name = f"{name}.{count}"
+            count = counts.get(name, 0)
+        deduped.append(name)
+        counts[name] = count + 1
+    return deduped
+
+def read_csv_file(path):
+    """Read a CSV with pyarrow, or with pandas if pyarrow can't parse it"""
+    try:
+        # Empty text cells are read as null, like pd.read_csv
+        table = pacsv.read_csv(path, convert_options=pacsv.ConvertOptions(strings_can_be_null=True))
+    except pa.ArrowInvalid:
+        # e.g. rows with fewer fields than the header, which pandas pads with NaN
+        return pd.read_csv(path)
+    return table.rename_columns(dedup_column_names(table.column_names))
+
+def stringify_mixed_columns(df):
+    """Cast object columns holding several value types to strings, which Parquet can store"""
+    mixed = [
+        c for c in df.columns
+        if df[c].dtype == object
+        and pd.api.types.infer_dtype(df[c], skipna=True) in ('mixed', 'mixed-integer')
+    ]
+    if not mixed:
+        return df
+    print(f"Writing mixed-type columns as strings: {mixed}")
+    return df.assign(**{c: df[c].map(str, na_action='ignore') for c in mixed})
+
+def merge_and_clean_files(input_dir, output_file, file_pattern=None, file_type='excel', custom_transforms=None, skip_cleaning=False, dropna_thresh_frac=0.3):
     """
     Dynamic file merger with user-defined parameters.
     - input_dir: folder containing files
-    - output_file: path for output
+    - output_file: path for output (.parquet, .xlsx, or anything else for CSV)
     - file_pattern: pattern to match files (e.g., 'sales_*.xlsx', 'report_2024*')
     - file_type: 'csv', 'excel', or 'both'
     - custom_transforms: list of functions to apply
     - skip_cleaning: skip default cleaning if True
+    - dropna_thresh_frac: minimum fraction of non-null columns a row needs to be kept
     """
     dfs = []
     
-    # Get all files in directory
-    all_files = os.listdir(input_dir)
-    
-    # Filter files by pattern if specified
-    if file_pattern:
-        all_files = [f for f in all_files if fnmatch(f.lower(), file_pattern.lower())]
-        print(f"Files matching pattern '{file_pattern}': {len(all_files)}")
+    all_files = list_input_files(input_dir, file_pattern)
     
     # Load CSV files
     if file_type in ['csv', 'both']:
         csv_files = [f for f in all_files if f.lower().endswith('.csv')]
         for fname in csv_files:
-            path = os.path.join(input_dir, fname)
             print(f"Loading CSV: {fname}")
-            dfs.append(pd.read_csv(path))
+        tables = read_files(read_csv_file, [os.path.join(input_dir, f) for f in csv_files])
+        if any(isinstance(table, pd.DataFrame) for table in tables):
+            # Some files needed pandas; convert the rest and keep the file order
+            dfs.extend(
+                table if isinstance(table, pd.DataFrame)
+                else table.to_pandas(types_mapper=ARROW_STRING_TYPES.get)
+                for table in tables
+            )
+        elif tables:
+            try:
+                # Concatenate in Arrow and convert to pandas once
+                combined = pa.concat_tables(tables, promote_options='permissive')
+                tables.clear()
+                dfs.append(combined.to_pandas(
+                    self_destruct=True, split_blocks=True, types_mapper=ARROW_STRING_TYPES.get
+                ))
+            except pa.ArrowException:
+                # Column types can't be unified across files; let pandas reconcile them
+                dfs.extend(table.to_pandas(types_mapper=ARROW_STRING_TYPES.get) for table in tables)
     
     # Load Excel files
     if file_type in ['excel', 'both']:
         excel_files = [f for f in all_files if f.lower().endswith(('.xlsx', '.xls'))]
         for fname in excel_files:
-            path = os.path.join(input_dir, fname)
             print(f"Loading Excel: {fname}")
-            excel_data = pd.read_excel(path, sheet_name=None)
+        workbooks = read_files(
+            lambda path: pd.read_excel(path, sheet_name=None, engine='calamine'),
+            [os.path.join(input_dir, f) for f in excel_files]
+        )
+        for excel_data in workbooks:
             for sheet_name, sheet_df in excel_data.items():
                 if not sheet_df.empty:
                     print(f"  Sheet: {sheet_name} ({sheet_df.shape[0]} rows)")
@@ -53,7 +139,7 @@ def merge_and_clean_files(input_dir, output_file, file_pattern=None, file_type='
     
     # Apply cleaning unless skipped
     if not skip_cleaning:
-        df = clean_data(df)
+        df = clean_data(df, dropna_thresh_frac)
     
     # Apply custom transformations
     if custom_transforms:
@@ -62,37 +148,93 @@ def merge_and_clean_files(input_dir, output_file, file_pattern=None, file_type='
             df = transform(df)
             print(f"After {transform.__name__}: {df.shape}")
     
-    # Save result
-    if output_file.lower().endswith('.xlsx'):
-        df.to_excel(output_file, index=False)
+    # Save result (Parquet is the fastest to write and re-read)
+    if output_file.lower().endswith('.parquet'):
+        # Uncleaned or custom-transformed data can still mix types within a column
+        stringify_mixed_columns(df).to_parquet(output_file, engine='pyarrow', compression='snappy', index=False)
+    elif output_file.lower().endswith('.xlsx'):
+        df.to_excel(output_file, index=False, engine='xlsxwriter')
     else:
         df.to_csv(output_file, index=False)
     print(f"Saved to {output_file}, final rows: {df.shape[0]}")
     return df
 
-def clean_data(df):
+def clean_data(df, dropna_thresh_frac=0.3):
     """Comprehensive data cleaning"""
     print("Starting data cleaning...")
     
-    # Remove completely empty rows/columns
-    df = df.dropna(how='all').dropna(axis=1, how='all')
-    print(f"After removing empty rows/cols: {df.shape}")
+    # Remove empty columns and rows below dropna_thresh_frac non-null (including
+    # empty rows) in a single pass; dropped columns are all-null so they don't
+    # affect row counts
+    notna = df.notna()
+    keep_cols = notna.any(axis=0)
+    thresh = max(int(dropna_thresh_frac * keep_cols.sum()), 1)
+    keep_rows = notna.sum(axis=1) >= thresh
+    df = df.loc[keep_rows, keep_cols]
+    print(f"After removing empty/incomplete rows and empty cols: {df.shape}")
     
     # Remove duplicates
     df = df.drop_duplicates()
     print(f"After removing duplicates: {df.shape}")
     
-    # Remove rows with >70% missing data
-    thresh = int(0.3 * len(df.columns))
-    df = df.dropna(thresh=thresh)
-    print(f"After removing incomplete rows: {df.shape}")
+    # Clean text columns; string columns are stripped directly, while object
+    # columns may hold non-string values and are cast to str first
+    null_tokens = ['', 'nan', 'None', 'null']
+    string_cols = df.select_dtypes(include=['string']).columns
+    if len(string_cols):
+        df[string_cols] = (
+            df[string_cols]
+            .apply(lambda col: col.str.strip())
+            .replace(null_tokens, pd.NA)
+        )
+    object_cols = [col for col in df.columns if df[col].dtype == object]
+    if object_cols:
+        df[object_cols] = (
+            df[object_cols]
+            .apply(lambda col: col.astype(str).str.strip())
+            .replace(null_tokens, pd.NA)
+        )
+    
+    return df
+
+def merge_and_clean_csvs_lazy(input_dir, output_file, file_pattern=None, dropna_thresh_frac=0.3):
+    """
+    Multithreaded CSV-only merge using a lazy Polars pipeline.
+    Applies the same row filters and text cleaning as clean_data, except that
+    empty columns are kept, and streams the result to output_file (CSV).
+    Returns the LazyFrame; use lf.collect().to_pandas() if a DataFrame is needed.
+    """
+    csv_files = [f for f in list_input_files(input_dir, file_pattern) if f.lower().endswith('.csv')]
+    if not csv_files:
+        raise FileNotFoundError(f"No matching files found in {input_dir}")
+    
+    for fname in csv_files:
+        print(f"Scanning CSV: {fname}")
+    lf = pl.concat(
+        [pl.scan_csv(os.path.join(input_dir, f)) for f in csv_files],
+        how='diagonal_relaxed'
+    )
+    
+    # Remove duplicates and rows below dropna_thresh_frac non-null (including empty rows)
+    schema = lf.collect_schema()
+    thresh = max(int(dropna_thresh_frac * len(schema)), 1)
+    lf = lf.unique(maintain_order=True).filter(
+        pl.sum_horizontal(pl.all().is_not_null()) >= thresh
+    )
     
     # Clean text columns
-    for col in df.select_dtypes(include=['object']).columns:
-        df[col] = df[col].astype(str).str.strip()
-        df[col] = df[col].replace(['', 'nan', 'None', 'null'], pd.NA)
+    text_cols = [name for name, dtype in schema.items() if dtype == pl.String]
+    lf = lf.with_columns(
+        pl.when(pl.col(c).str.strip_chars().is_in(['', 'nan', 'None', 'null']))
+        .then(None)
+        .otherwise(pl.col(c).str.strip_chars())
+        .alias(c)
+        for c in text_cols
+    )
     
-    return df
+    lf.sink_csv(output_file)
+    print(f"Saved to {output_file}")
+    return lf
 
 def interactive_merge():
     """Interactive mode for user input"""
@@ -112,7 +254,7 @@ def interactive_merge():
     pattern = input("\nFile pattern (e.g., 'sales_*.xlsx' or press Enter for all): ").strip()
     
     # Get output file
-    output = input("Output file (default: merged_output.xlsx): ").strip() or "merged_output.xlsx"
+    output = input("Output file [.parquet/.xlsx/.csv] (default: merged_output.parquet): ").strip() or "merged_output.parquet"
     
     # Get file type
     file_type = input("File type [excel/csv/both] (default: excel): ").strip() or "excel"
@@ -132,8 +274,11 @@ def filter_recent_data(df):
 
 def remove_test_data(df):
     """Example: Remove rows containing 'test' in any column"""
-    mask = df.astype(str).apply(lambda x: x.str.contains('test', case=False, na=False)).any(axis=1)
-    return df[~mask]
+    # Only text columns can contain 'test', so numeric/date columns are skipped
+    mask = np.zeros(len(df), dtype=bool)
+    for col in df.select_dtypes(include=['object', 'string', 'category']).columns:
+        mask |= df[col].astype('string').str.contains('test', case=False, na=False).to_numpy()
+    return df.loc[~mask]
 
 if __name__ == "__main__":
     import sys
@@ -152,10 +297,13 @@ if __name__ == "__main__":
         # Example 2: Merge specific pattern
         # merge_and_clean_files(INPUT_DIR, "sales_merged.xlsx", "sales_*.xlsx")
         
+        # Example 3: Fast CSV-only merge with Polars
+        # merge_and_clean_csvs_lazy(INPUT_DIR, "csv_merged.csv", "*.csv")
+        
         # Basic merge with cleaning only
         merge_and_clean_files(
             input_dir=".",
-            output_file="merged_cleaned.xlsx",
+            output_file="merged_cleaned.parquet",
             file_pattern=None,  # All files
             custom_transforms=None  # No custom transforms
         )
@@ -1,4 +1,5 @@
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import os
 from dotenv import load_dotenv
@@ -13,10 +14,17 @@ HEADERS = {
     'Content-Type': 'application/json'
 }
 
+# Reuse connections across requests instead of reconnecting for each call
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=3)
+SESSION.mount('http://', adapter)
+SESSION.mount('https://', adapter)
+
 def test_get_all_data():
     """Test getting all data"""
     print("Testing GET /api/crm/data...")
-    response = requests.get(f"{BASE_URL}/crm/data", headers=HEADERS)
+    response = SESSION.get(f"{BASE_URL}/crm/data")
     print(f"Status: {response.status_code}")
     print(f"Response: {json.dumps(response.json(), indent=2)}")
     print("-" * 50)
@@ -24,7 +32,7 @@ def test_get_all_data():
 def test_get_specific_data(email_id):
     """Test getting specific record by email"""
     print(f"Testing GET /api/crm/data/{email_id}...")
-    response = requests.get(f"{BASE_URL}/crm/data/{email_id}", headers=HEADERS)
+    response = SESSION.get(f"{BASE_URL}/crm/data/{email_id}")
     print(f"Status: {response.status_code}")
     print(f"Response: {json.dumps(response.json(), indent=2)}")
     print("-" * 50)
@@ -32,7 +40,7 @@ def test_get_specific_data(email_id):
 def test_unauthorized():
     """Test unauthorized access"""
     print("Testing unauthorized access...")
-    response = requests.get(f"{BASE_URL}/data")
+    response = SESSION.get(f"{BASE_URL}/data", headers={'Authorization': None})
     print(f"Status: {response.status_code}")
     print(f"Response: {json.dumps(response.json(), indent=2)}")
     print("-" * 50)
@@ -0,0 +1,106 @@
+import importlib
+import os
+from decimal import Decimal
+from pathlib import Path
+
+import boto3
+import pytest
+from moto import mock_aws
+
+
+@pytest.fixture(scope='module')
+def api():
+    """The api module, backed by a moto DynamoDB table with a few records"""
+    patcher = pytest.MonkeyPatch()
+    patcher.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    patcher.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    patcher.setenv('AWS_DEFAULT_REGION', 'ap-south-1')
+    # api.py loads config.json from the working directory
+    patcher.chdir(Path(__file__).parent)
+    with mock_aws():
+        table = boto3.resource('dynamodb', region_name='ap-south-1').create_table(
+            TableName='Working_Proffessionals',
+            KeySchema=[{'AttributeName': 'EmailId', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[{'AttributeName': 'EmailId', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST',
+        )
+        with table.batch_writer() as batch:
+            for i in range(50):
+                batch.put_item(Item={'EmailId': f'user{i}@x.com', 'Name': f'user{i}', 'Age': Decimal(i) + Decimal('0.5')})
+        yield importlib.import_module('api')
+    patcher.undo()
+
+
+@pytest.fixture
+def client(api):
+    api.cache.clear()
+    return api.app.test_client()
+
+
+def get(client, api, path='/api/crm/data', **headers):
+    return client.get(path, headers={'Authorization': f'Bearer {api.AUTH_TOKEN}', **headers})
+
+
+def test_miss_is_streamed_without_etag(client, api):
+    response = get(client, api)
+    assert 'ETag' not in response.headers
+    data = response.get_json()
+    assert data['count'] == len(data['data']) == 50
+    assert data['data'][0]['Age'] == str(Decimal(data['data'][0]['Name'][4:]) + Decimal('0.5'))
+
+
+def test_hit_is_served_from_cache_with_etag(client, api):
+    streamed = get(client, api).get_data()
+    response = get(client, api)
+    assert response.get_data() == streamed
+    assert response.headers['ETag']
+    assert response.cache_control.max_age == api.CACHE_TIMEOUT
+
+
+def test_etag_is_stable_across_cache_generations(client, api):
+    get(client, api).get_data()
+    etag = get(client, api).headers['ETag']
+    api.cache.clear()
+    get(client, api).get_data()
+    assert get(client, api).headers['ETag'] == etag
+
+
+def test_matching_etag_returns_304(client, api):
+    get(client, api).get_data()
+    etag = get(client, api).headers['ETag']
+    response = get(client, api, **{'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.get_data() == b''
+
+
+def test_conditional_miss_is_buffered_and_revalidated(client, api):
+    get(client, api).get_data()
+    etag = get(client, api).headers['ETag']
+    api.cache.clear()
+    assert get(client, api, **{'If-None-Match': etag}).status_code == 304
+
+    api.cache.clear()
+    response = get(client, api, **{'If-None-Match': '"stale"'})
+    assert response.status_code == 200
+    assert response.headers['ETag'] == etag
+
+
+def test_only_complete_bodies_are_cached(client, api):
+    response = get(client, api)
+    next(response.response)
+    response.close()
+    # Not cached, so the next request is another streamed miss
+    assert 'ETag' not in get(client, api).headers
+
+    get(client, api).get_data()
+    assert 'ETag' in get(client, api).headers
+
+
+def test_scan_error_returns_500(client, api, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError('scan failed')
+    monkeypatch.setattr(api, 'scan_segment', fail)
+    response = get(client, api)
+    assert response.status_code == 500
+    assert response.get_json() == {'error': 'scan failed'}
+    assert get(client, api, **{'If-None-Match': '"x"'}).status_code == 500
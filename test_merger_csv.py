@@ -0,0 +1,40 @@
+import pandas as pd
+
+from merger_csv import merge_and_clean_files
+
+
+def test_empty_csv_rows_are_dropped(tmp_path):
+    (tmp_path / 'people.csv').write_text('name,city,age\n,,\nann,york,30\nbob,,\n')
+    output = tmp_path / 'merged.csv'
+    df = merge_and_clean_files(str(tmp_path), str(output), file_type='csv')
+    assert df['name'].tolist() == ['ann', 'bob']
+    assert output.read_text().splitlines() == ['name,city,age', 'ann,york,30.0', 'bob,,']
+
+
+def test_short_csv_rows_are_padded_with_nulls(tmp_path):
+    (tmp_path / 'short.csv').write_text('name,city,age\nann,york\nbob,leeds,40\n')
+    df = merge_and_clean_files(str(tmp_path), str(tmp_path / 'merged.csv'), file_type='csv')
+    assert df['name'].tolist() == ['ann', 'bob']
+    assert df['age'].isna().tolist() == [True, False]
+
+
+def test_duplicate_csv_headers_are_renamed(tmp_path):
+    (tmp_path / 'dupes.csv').write_text('name,name,city\nann,anne,york\n')
+    df = merge_and_clean_files(str(tmp_path), str(tmp_path / 'merged.csv'), file_type='csv')
+    assert list(df.columns) == ['name', 'name.1', 'city']
+    assert df.iloc[0].tolist() == ['ann', 'anne', 'york']
+
+
+def test_parquet_output_stringifies_mixed_columns(tmp_path):
+    (tmp_path / 'people.csv').write_text('name,age\nann,30\nbob,40\n')
+
+    def mix_types(df):
+        df['age'] = pd.Series([30, 'unknown'], dtype=object)
+        return df
+
+    output = tmp_path / 'merged.parquet'
+    df = merge_and_clean_files(
+        str(tmp_path), str(output), file_type='csv', custom_transforms=[mix_types], skip_cleaning=True
+    )
+    assert df['age'].tolist() == [30, 'unknown']
+    assert pd.read_parquet(output)['age'].tolist() == ['30', 'unknown']
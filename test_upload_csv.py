@@ -0,0 +1,53 @@
+import datetime
+from decimal import Decimal
+
+import pandas as pd
+
+import upload_csv
+from upload_csv import DynamoDBUploader
+
+
+def make_uploader():
+    """Uploader without AWS setup, for testing the conversion helpers"""
+    return DynamoDBUploader.__new__(DynamoDBUploader)
+
+
+def test_convert_keeps_types_in_mixed_object_columns():
+    df = pd.DataFrame({
+        'EmailId': ['a@x.com', 'b@x.com', 'c@x.com', 'd@x.com', 'e@x.com'],
+        'Mixed': pd.Series([1, 3.5, True, datetime.datetime(2024, 1, 2, 3, 4, 5), None], dtype=object),
+    })
+    records = make_uploader().convert_to_dynamodb_format(df).to_dict(orient='records')
+    assert [r['Mixed'] for r in records] == [1, Decimal('3.5'), 1, '2024-01-02 03:04:05', None]
+    assert isinstance(records[0]['Mixed'], int)
+
+
+def test_convert_typed_columns():
+    df = pd.DataFrame({
+        'Age': [1.5, None],
+        'Count': [2, 3],
+        'Flag': [True, False],
+        'Name': ['x', None],
+    })
+    records = make_uploader().convert_to_dynamodb_format(df).to_dict(orient='records')
+    assert records == [
+        {'Age': Decimal('1.5'), 'Count': 2, 'Flag': 1, 'Name': 'x'},
+        {'Age': None, 'Count': 3, 'Flag': 0, 'Name': None},
+    ]
+
+
+def test_read_csv_batches_handles_type_change_after_first_chunk(tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_csv, 'CSV_CHUNK_ROWS', 1000)
+    scores = [str(i) for i in range(3001)] + ['12.5'] + [str(i) for i in range(500)]
+    path = tmp_path / 'scores.csv'
+    path.write_text('EmailId,score\n' + ''.join(f'u{i}@x.com,{s}\n' for i, s in enumerate(scores)))
+
+    uploader = make_uploader()
+    records = [
+        record
+        for batch in uploader.read_csv_batches(str(path))
+        for record in uploader.convert_to_dynamodb_format(batch).to_dict(orient='records')
+    ]
+    assert len(records) == len(scores)
+    assert records[0]['score'] == 0
+    assert records[3001]['score'] == Decimal('12.5')
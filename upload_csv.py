@@ -1,27 +1,54 @@
 import pandas as pd
 import boto3
 from boto3.dynamodb.conditions import Key
+from botocore.config import Config
 import json
 import sys
 import os
+import math
+import functools
+import datetime
+import itertools
+import threading
 from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Number of concurrent batch writers used for uploads
+UPLOAD_WORKERS = 16
+UPLOAD_CLIENT_CONFIG = Config(
+    max_pool_connections=UPLOAD_WORKERS * 2,
+    retries={'max_attempts': 10, 'mode': 'adaptive'}
+)
+
+# CSVs are read and uploaded in chunks of this many rows to bound memory
+CSV_CHUNK_ROWS = 100_000
+
+@functools.lru_cache(maxsize=None)
+def get_session(region):
+    """Shared boto3 session, created once per region"""
+    # AWS credentials from environment variables
+    return boto3.Session(
+        region_name=region,
+        aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+        aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY')
+    )
+
+@functools.lru_cache(maxsize=None)
+def get_dynamodb_resource(region):
+    """Shared DynamoDB resource, so the service model is only loaded once"""
+    return get_session(region).resource('dynamodb', config=UPLOAD_CLIENT_CONFIG)
+
 class DynamoDBUploader:
-    def __init__(self, config):
-        # AWS credentials from environment variables
-        self.dynamodb = boto3.resource(
-            'dynamodb',
-            region_name=config['aws']['region'],
-            aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY')
-        )
+    def __init__(self, config, dynamodb=None):
+        self.dynamodb = dynamodb or get_dynamodb_resource(config['aws']['region'])
         self.table_name = config['dynamodb']['table_name']
         self.primary_key_column = config['dynamodb']['primary_key_column']
         self.region = config['aws']['region']
+        self.worker_state = threading.local()
         
         # Validate AWS connection
         self.validate_aws_connection()
@@ -32,12 +59,7 @@ class DynamoDBUploader:
     def validate_aws_connection(self):
         """Validate AWS credentials and connection"""
         try:
-            sts = boto3.client(
-                'sts',
-                region_name=self.region,
-                aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-                aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY')
-            )
+            sts = get_session(self.region).client('sts')
             identity = sts.get_caller_identity()
             print(f"✓ AWS connection validated for account: {identity['Account']}")
         except Exception as e:
@@ -113,34 +135,88 @@ class DynamoDBUploader:
         # TODO: Add transformation logic
         return df
     
-    def convert_to_dynamodb_format(self, item):
-        """Convert pandas data types to DynamoDB compatible format"""
-        import datetime
-        for key, value in item.items():
-            if pd.isna(value):
-                item[key] = None
-            elif isinstance(value, float):
-                item[key] = Decimal(str(value))
-            elif isinstance(value, int):
-                item[key] = int(value)  # Keep integers as integers
-            elif isinstance(value, (datetime.datetime, datetime.date)):
-                item[key] = value.strftime('%Y-%m-%d %H:%M:%S')
-            elif isinstance(value, pd.Timestamp):
-                item[key] = value.strftime('%Y-%m-%d %H:%M:%S')
+    def convert_value(self, value):
+        """Convert a single non-null value from a mixed (object) column"""
+        if isinstance(value, float):
+            return Decimal(str(value))
+        elif isinstance(value, int):
+            return int(value)  # Keep integers as integers (booleans become 0/1)
+        elif isinstance(value, (datetime.datetime, datetime.date)):
+            return value.strftime('%Y-%m-%d %H:%M:%S')
+        return str(value)  # Convert everything else to string
+    
+    def convert_to_dynamodb_format(self, df):
+        """Convert DataFrame columns to DynamoDB compatible types, one column at a time"""
+        df = df.copy()
+        for col in df.columns:
+            series = df[col]
+            missing = series.isna()
+            if pd.api.types.is_bool_dtype(series):
+                series = series.astype('int64')  # Store booleans as integers
+            elif pd.api.types.is_integer_dtype(series):
+                pass  # Keep integers as integers
+            elif pd.api.types.is_float_dtype(series):
+                # str() gives the shortest exact repr; Decimal.from_float gives the full
+                # binary expansion, which boto3 rejects as Inexact unless quantized
+                series = series.map(lambda v: Decimal(str(v)), na_action='ignore')
+            elif pd.api.types.is_datetime64_any_dtype(series):
+                series = series.dt.strftime('%Y-%m-%d %H:%M:%S')
+            elif series.dtype == object:
+                # Mixed values (common from Excel) keep their own types
+                series = series.map(self.convert_value, na_action='ignore')
             else:
-                item[key] = str(value)  # Convert everything else to string
-        return item
+                series = series.astype(str)  # Convert everything else to string
+            df[col] = series.astype(object).where(~missing, None)
+        return df
+    
+    def worker_table(self):
+        """Table handle for the current worker thread, created on first use"""
+        # boto3 resources are not thread-safe, so each worker builds its own
+        if not hasattr(self.worker_state, 'table'):
+            dynamodb = boto3.session.Session().resource(
+                'dynamodb',
+                region_name=self.region,
+                aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+                aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
+                config=UPLOAD_CLIENT_CONFIG
+            )
+            self.worker_state.table = dynamodb.Table(self.table_name)
+        return self.worker_state.table
+    
+    def upload_chunk(self, records):
+        """Write a slice of records through the worker's batch writer"""
+        with self.worker_table().batch_writer() as batch:
+            for item in records:
+                batch.put_item(Item=item)
+        return len(records)
+    
+    def upload_records(self, records, executor):
+        """Upload records using concurrent batch writers"""
+        if not records:
+            return 0
+        chunk_size = math.ceil(len(records) / UPLOAD_WORKERS)
+        chunks = [records[i:i + chunk_size] for i in range(0, len(records), chunk_size)]
+        return sum(executor.map(self.upload_chunk, chunks))
+    
+    def read_csv_batches(self, file_path):
+        """Stream a CSV as DataFrames of CSV_CHUNK_ROWS rows each"""
+        # pandas infers types per chunk, so a column whose values change type in a
+        # later chunk can't fail the read part-way through an upload
+        with pd.read_csv(file_path, chunksize=CSV_CHUNK_ROWS) as reader:
+            yield from reader
     
     def upload_file(self, file_path):
         try:
-            # Read file based on extension
+            # Read file based on extension; CSVs are streamed block by block
             if file_path.endswith('.csv'):
-                df = pd.read_csv(file_path)
+                batches = self.read_csv_batches(file_path)
             elif file_path.endswith(('.xlsx', '.xls')):
-                df = pd.read_excel(file_path)
+                batches = iter([pd.read_excel(file_path)])
             else:
                 raise ValueError("Unsupported file format. Use CSV or XLSX.")
             
+            # Validation, table creation and the overlap check use the first block
+            df = next(batches, pd.DataFrame())
             print(f"Loaded {len(df)} rows from {file_path}")
             print(f"Available columns: {list(df.columns)}")
             
@@ -163,23 +239,25 @@ class DynamoDBUploader:
                 else:
                     print("✓ No data overlap detected. Proceeding with upload.")
             
-            # Apply transformation
-            df = self.transform_data(df)
-            
-            # Upload to DynamoDB
             uploaded_count = 0
-            with self.table.batch_writer() as batch:
-                for _, row in df.iterrows():
-                    item = row.to_dict()
-                    item = self.convert_to_dynamodb_format(item)
+            with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as executor:
+                for block_number, df in enumerate(itertools.chain([df], batches)):
+                    if block_number > 0:
+                        print(f"Loaded {len(df)} more rows from {file_path}")
+                    
+                    # Apply transformation
+                    df = self.transform_data(df)
+                    
+                    # Drop rows with a missing primary key before converting
+                    missing_key = df[self.primary_key_column].isna()
+                    if missing_key.any():
+                        print(f"Skipping {missing_key.sum()} rows with missing primary key")
+                        df = df[~missing_key]
                     
-                    # Ensure primary key exists
-                    if self.primary_key_column not in item or item[self.primary_key_column] is None:
-                        print(f"Skipping row with missing primary key: {item}")
-                        continue
+                    records = self.convert_to_dynamodb_format(df).to_dict(orient='records')
                     
-                    batch.put_item(Item=item)
-                    uploaded_count += 1
+                    # Upload to DynamoDB
+                    uploaded_count += self.upload_records(records, executor)
             
             print(f"✓ Successfully uploaded {uploaded_count} items to DynamoDB table '{self.table_name}'")
             
@@ -187,6 +265,7 @@ class DynamoDBUploader:
             print(f"✗ Error uploading file: {str(e)}")
             sys.exit(1)
 
+@functools.lru_cache(maxsize=1)
 def load_config():
     config_path = os.path.join(os.path.dirname(__file__), 'config.json')
     with open(config_path, 'r') as f:
@@ -211,7 +290,7 @@ def main():
         sys.exit(1)
     
     config = load_config()
-    uploader = DynamoDBUploader(config)
+    uploader = DynamoDBUploader(config, dynamodb=get_dynamodb_resource(config['aws']['region']))
     uploader.upload_file(file_path)
 
 if __name__ == "__main__":